@@ -10,90 +10,159 @@ import nuke  # type: ignore
 import nukescripts  # type: ignore
 from nukescripts import panels  # type: ignore
 import importlib
+import os
 import sys
 
 
 nuke.pluginAddPath('./nuke_tools')
 
-# Tools on NUKE_PATH
-from screens_manager import ScreensManagerPanel  # type: ignore
-from render_hooks import encapsulate_write_with_variable_group  # type: ignore
+# Nuke runs every plugin's menu.py in the shared __main__ namespace, so the
+# module-level state and helpers below carry a BCN prefix to avoid clashing
+# with globals defined by other plugins.
+
+# Session-invariant; resolved once so terminal sessions skip all GUI wiring.
+_BCN_IS_GUI: bool = bool(nuke.env.get('gui'))
+
+# Tools on NUKE_PATH are imported on first use so terminal sessions and farm
+# workers never pay for the Qt import pulled in by screens_manager.
+_BCN_PANEL_CLS: Optional[type] = None
+
+# Source mtimes seen at the last reload, keyed by module name.
+_BCN_RELOAD_MTIMES: dict = {}
+
+# Set once the panel is registered. Read back from globals() so a second
+# execution of this menu.py in the same namespace does not register again.
+_BCN_SCREENS_PANEL_REGISTERED: bool = globals().get('_BCN_SCREENS_PANEL_REGISTERED', False)
+
+
+def _bcn_cached_import(module_name: str):
+    """Return `module_name` from `sys.modules`, importing it only on a miss."""
+
+    module = sys.modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+    return module
+
+
+def _bcn_load_panel_class() -> type:
+    """Import `ScreensManagerPanel` once and publish it for panel registration."""
+
+    global _BCN_PANEL_CLS
+    if _BCN_PANEL_CLS is None:
+        _BCN_PANEL_CLS = _bcn_cached_import('screens_manager').ScreensManagerPanel
+        # registerWidgetAsPanel resolves the widget class by name in this namespace
+        globals()['ScreensManagerPanel'] = _BCN_PANEL_CLS
+    return _BCN_PANEL_CLS
+
+
+def wrap_selected_in_variable_group() -> Optional[object]:
+    """Menu entry point that imports render_hooks on demand."""
+
+    return _bcn_cached_import('render_hooks').encapsulate_write_with_variable_group()
 
 
 def add_screens_manager_panel() -> Optional[object]:
     """Create and dock the Screens Manager panel next to Properties."""
 
     try:
+        _bcn_load_panel_class()
         pane = nuke.getPaneFor('Properties.1')
         return panels.registerWidgetAsPanel('ScreensManagerPanel', 'Screens Manager', 'uk.co.bcn.multishot.screens_manager', True).addToPane(pane) if pane else panels.registerWidgetAsPanel('ScreensManagerPanel', 'Screens Manager', 'uk.co.bcn.multishot.screens_manager', True)
     except Exception:
         return None
 
 
+def register_screens_manager_panel() -> None:
+    """Register the Pane menu entry and layout-restore hook exactly once."""
+
+    global _BCN_SCREENS_PANEL_REGISTERED
+    if _BCN_SCREENS_PANEL_REGISTERED:
+        return None
+    nuke.menu('Pane').addCommand('Screens Manager', add_screens_manager_panel)
+    nukescripts.registerPanel('uk.co.bcn.multishot.screens_manager', add_screens_manager_panel)
+    _BCN_SCREENS_PANEL_REGISTERED = True
+    return None
+
+
 def reload_bcn_multishot() -> None:
     """Reload BCN Multishot toolset modules and refresh bound callables.
 
     This reloads the key modules (screens_manager, overrides, render_hooks),
     then rebinds exported callables used by menu items so newly edited code
-    takes effect without restarting Nuke.
+    takes effect without restarting Nuke. Modules whose source file has not
+    changed since the previous reload are skipped.
     """
 
+    global _BCN_PANEL_CLS
+
     modules_to_reload = [
         'screens_manager',
         'overrides',
         'render_hooks',
     ]
 
+    # Make sure finders notice files added since startup
+    importlib.invalidate_caches()
+
+    modules = sys.modules
     reloaded = []
     for module_name in modules_to_reload:
         try:
-            module = sys.modules.get(module_name)
+            module = modules.get(module_name)
             if module is None:
+                # Fresh import already runs the current source; no reload needed
                 module = importlib.import_module(module_name)
+                path = getattr(module, '__file__', None)
+                if path:
+                    _BCN_RELOAD_MTIMES[module_name] = os.path.getmtime(path)
+                reloaded.append(module_name)
+                continue
+            path = getattr(module, '__file__', None)
+            if not path:
+                continue
+            mtime = os.path.getmtime(path)
+            if mtime == _BCN_RELOAD_MTIMES.get(module_name):
+                continue
             importlib.reload(module)
+            _BCN_RELOAD_MTIMES[module_name] = mtime
             reloaded.append(module_name)
         except Exception:
             # Best-effort reload; skip failures silently to avoid interrupting UX
             pass
 
-    # Rebind globals used by menu wiring so commands use the latest code
+    # Rebind the cached panel class so new panels use the latest code;
+    # render_hooks is looked up at call time and needs no rebinding.
     try:
         if 'screens_manager' in sys.modules:
-            globals()['ScreensManagerPanel'] = getattr(sys.modules['screens_manager'], 'ScreensManagerPanel', ScreensManagerPanel)
-        if 'render_hooks' in sys.modules:
-            globals()['encapsulate_write_with_variable_group'] = getattr(sys.modules['render_hooks'], 'encapsulate_write_with_variable_group', encapsulate_write_with_variable_group)
+            _BCN_PANEL_CLS = None
+            _bcn_load_panel_class()
     except Exception:
         pass
 
     try:
         nuke.tprint('BCN Multishot reloaded modules: ' + ', '.join(reloaded))
-        if nuke.env.get('gui'):
+        if _BCN_IS_GUI:
             nuke.message('BCN Multishot reloaded: ' + (', '.join(reloaded) or 'no modules reloaded'))
     except Exception:
         pass
 
 
 # GUI-only wiring
-try:
-    if nuke.env['gui']:
-        # Pane menu entry
-        nuke.menu('Pane').addCommand('Screens Manager', add_screens_manager_panel)
-        # Enable layout save/restore
-        nukescripts.registerPanel('uk.co.bcn.multishot.screens_manager', add_screens_manager_panel)
-        # Optional: Nuke menu shortcut
-        nuke.menu('Nuke').addCommand(
-            'BCN Multishot/Screens Manager',
-            add_screens_manager_panel,
-        )
-        # Write helpers
-        nuke.menu('Nuke').addCommand(
-            'BCN Multishot/Wrap Node in Variable Group',
-            encapsulate_write_with_variable_group,
-        )
-        # Reload plugin for rapid iteration
-        nuke.menu('Nuke').addCommand(
-            'BCN Multishot/Reload Plugin',
-            reload_bcn_multishot,
-        )
-except Exception:
-    pass
+if _BCN_IS_GUI:
+    # Pane menu entry and layout save/restore
+    register_screens_manager_panel()
+    # Optional: Nuke menu shortcut
+    nuke.menu('Nuke').addCommand(
+        'BCN Multishot/Screens Manager',
+        add_screens_manager_panel,
+    )
+    # Write helpers
+    nuke.menu('Nuke').addCommand(
+        'BCN Multishot/Wrap Node in Variable Group',
+        wrap_selected_in_variable_group,
+    )
+    # Reload plugin for rapid iteration
+    nuke.menu('Nuke').addCommand(
+        'BCN Multishot/Reload Plugin',
+        reload_bcn_multishot,
+    )
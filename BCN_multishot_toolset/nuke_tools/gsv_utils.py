@@ -4,7 +4,8 @@ All functions are defensive and return early when Nuke is not available to
 keep the module import-safe outside Nuke.
 """
 
-from typing import Iterable, List, Optional, Sequence, Dict, Any
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Dict, Any, Tuple
 
 try:
     import nuke  # type: ignore
@@ -12,15 +13,136 @@ except Exception:  # pragma: no cover - allow importing outside Nuke
     nuke = None  # type: ignore
 
 
+# Root GSV knob of the open script, reused across calls. Only populated when
+# the script load/close hooks below are installed to invalidate it.
+_root_gsv_cache = None
+# Hook flags are read back from globals() so reloading this module does not
+# register a second copy of each callback; the registered functions resolve
+# state through this same module namespace.
+_cache_hooks_installed: bool = globals().get("_cache_hooks_installed", False)
+
+
+def _invalidate_root_gsv_cache(*_args, **_kwargs) -> None:
+    """Drop the cached Root GSV knob (script opened, closed or cleared)."""
+
+    global _root_gsv_cache
+    _root_gsv_cache = None
+
+
+def _install_cache_hooks() -> None:
+    """Register script load/close callbacks that invalidate the GSV cache."""
+
+    global _cache_hooks_installed
+    if nuke is None:
+        return
+    if not _cache_hooks_installed:
+        try:
+            nuke.addOnScriptLoad(_invalidate_root_gsv_cache)
+            nuke.addOnScriptClose(_invalidate_root_gsv_cache)
+            _cache_hooks_installed = True
+        except Exception:
+            pass
+
+
+_install_cache_hooks()
+
+
+def _resolve_gsv_change_api() -> Optional[Tuple[Callable, Callable]]:
+    """Return the (add, remove) pair registering GSV change callbacks, if any.
+
+    Only a matching add/remove pair is trusted: `on*` names in `nuke.callbacks`
+    are dispatchers that run the registered callbacks rather than register one.
+    """
+
+    for owner in (getattr(nuke, "callbacks", None), nuke):
+        add = getattr(owner, "addOnGsvSetChanged", None)
+        remove = getattr(owner, "removeOnGsvSetChanged", None)
+        if callable(add) and callable(remove):
+            return add, remove
+    return None
+
+
+# Resolved once; None when this Nuke offers no GSV change registration.
+_GSV_CHANGE_API = _resolve_gsv_change_api()
+
+
+def add_gsv_change_callback(callback: Callable[..., Any]) -> bool:
+    """Register `callback` to run on GSV changes.
+
+    Returns True only when it was registered; False when this Nuke has no GSV
+    change registration API or the registration was rejected.
+    """
+
+    if _GSV_CHANGE_API is None:
+        return False
+    try:
+        _GSV_CHANGE_API[0](callback)
+    except Exception:
+        return False
+    return True
+
+
+def remove_gsv_change_callback(callback: Callable[..., Any]) -> bool:
+    """Unregister a callback added with `add_gsv_change_callback`."""
+
+    if _GSV_CHANGE_API is None:
+        return False
+    try:
+        _GSV_CHANGE_API[1](callback)
+    except Exception:
+        return False
+    return True
+
+
 def get_root_gsv_knob():
-    """Return the Root GSV knob (`nuke.Gsv_Knob`) or None if unavailable."""
+    """Return the Root GSV knob (`nuke.Gsv_Knob`) or None if unavailable.
 
+    The knob is cached for the lifetime of the open script so repeated
+    helpers do not walk `nuke.root()["gsv"]` on every call.
+    """
+
+    global _root_gsv_cache
     if nuke is None:
         return None
+    if _root_gsv_cache is not None:
+        return _root_gsv_cache
     try:
-        return nuke.root()["gsv"]
+        gsv = nuke.root()["gsv"]
     except Exception:
         return None
+    if _cache_hooks_installed:
+        _root_gsv_cache = gsv
+    return gsv
+
+
+@contextmanager
+def gsv_batch() -> Iterator[Any]:
+    """Yield the Root GSV knob (or None) once for a group of related calls.
+
+    Example:
+        with gsv_batch() as gsv:
+            if gsv is not None:
+                gsv.setGsvValue("__default__.screens", "Moxy")
+    """
+
+    yield get_root_gsv_knob()
+
+
+def _apply_gsv_ops(ops: Sequence[Tuple[str, Tuple[Any, ...]]]) -> None:
+    """Apply `(method_name, args)` calls to the Root GSV knob, fetched once.
+
+    Each call is attempted independently so one rejected operation does not
+    prevent the rest from applying. No-op when the knob is unavailable.
+    """
+
+    with gsv_batch() as gsv:
+        if gsv is None:
+            return
+        for method_name, args in ops:
+            try:
+                getattr(gsv, method_name)(*args)
+            except Exception:
+                pass
 
 
 def ensure_list_datatype(path: str) -> None:
@@ -64,16 +186,23 @@ def get_list_options(path: str) -> List[str]:
         return []
 
 
-def set_value(path: str, value: str) -> None:
-    """Set the GSV value at `path`. No-op on failure."""
+def get_screen_options() -> List[str]:
+    """Return the `__default__.screens` list options (empty on error)."""
+
+    return get_list_options("__default__.screens")
+
+
+def set_value(path: str, value: str) -> bool:
+    """Set the GSV value at `path`. Returns True on success, False on failure."""
 
     gsv = get_root_gsv_knob()
     if gsv is None:
-        return
+        return False
     try:
         gsv.setGsvValue(path, value)
     except Exception:
-        pass
+        return False
+    return True
 
 
 def set_favorite(path: str, is_favorite: bool = True) -> None:
@@ -180,27 +309,29 @@ def ensure_screen_list(screens: Sequence[str], default_screen: Optional[str] = N
       - default_screen: initial selection; falls back to first option
     """
 
+    if nuke is None:
+        return
+
     # Guard: if provided default is not among options, fall back to first option
     if (not default_screen or (default_screen not in screens)) and screens:
         default_screen = screens[0]
 
+    path = "__default__.screens"
+    ops: List[Tuple[str, Tuple[Any, ...]]] = []
     # Create the variable first so subsequent type/option calls can succeed
     if default_screen:
-        try:
-            set_value("__default__.screens", default_screen)
-        except Exception:
-            pass
-
+        ops.append(("setGsvValue", (path, default_screen)))
     # Ensure list type and options on the newly created variable
     # IMPORTANT: Do not call gsv.setValue/merge_root_value here, as it
     # would reset the variable type back to Text. Use the typed API only.
-    ensure_list_datatype("__default__.screens")
-    set_list_options("__default__.screens", screens)
-    # Ensure visibility in Variables panel by marking as favorite
     try:
-        set_favorite("__default__.screens", True)
+        ops.append(("setDataType", (path, nuke.gsv.DataType.List)))  # type: ignore[attr-defined]
     except Exception:
         pass
+    ops.append(("setListOptions", (path, list(screens))))
+    # Ensure visibility in Variables panel by marking as favorite
+    ops.append(("setFavorite", (path, True)))
+    _apply_gsv_ops(ops)
 
 
 def create_variable_group(name: str):
@@ -217,6 +348,26 @@ def create_variable_group(name: str):
         return None
 
 
+def ensure_variable_groups(names: Iterable[str]) -> None:
+    """Create a VariableGroup for each name in `names` that does not exist yet.
+
+    Existing VariableGroups in the current context are listed once up front,
+    so repeated calls only create what is missing. Duplicate names are
+    created once.
+    """
+
+    if nuke is None:
+        return
+    try:
+        existing = {n.name() for n in nuke.allNodes("VariableGroup")}
+    except Exception:
+        existing = set()
+    for name in names:
+        if name and name not in existing:
+            create_variable_group(name)
+            existing.add(name)
+
+
 def ensure_screen_sets(screens: Sequence[str]) -> None:
     """Ensure there is a GSV set for each screen name.
 
@@ -19,6 +19,8 @@ try:
 except Exception:  # pragma: no cover
     nuke = None  # type: ignore
 
+import gsv_utils
+
 
 def set_knob_expression_from_gsv(node: "nuke.Node", knob_name: str, gsv_path: str) -> None:  # type: ignore[name-defined]
     """Inject a python expression to read a value from a GSV path.
@@ -59,27 +61,12 @@ def set_knob_expression_for_screen_field(node: "nuke.Node", knob_name: str, fiel
 def on_screen_changed(callback) -> Optional[object]:
     """Attach a handler for when `__default__.screens` changes, if supported.
 
-    Uses `nuke.callbacks.onGsvSetChanged` when available; returns the handler
-    token/object if applicable; otherwise None.
+    Registers through `gsv_utils.add_gsv_change_callback`; returns `callback`
+    when it was registered, otherwise None so callers can decide alternative
+    strategies.
     """
 
-    if nuke is None:
-        return None
-
-    cb = getattr(nuke, "callbacks", None)
-    if cb is None:
-        return None
-
-    handler = None
-    try:
-        # Prefer the specific GSV change callback if present
-        if hasattr(cb, "onGsvSetChanged"):
-            handler = cb.onGsvSetChanged(callback)  # type: ignore[attr-defined]
-            return handler
-    except Exception:
-        # Fall back to no registration; callers can decide alternative strategies
-        return None
-    return None
+    return callback if gsv_utils.add_gsv_change_callback(callback) else None
 
 
 __all__ = [
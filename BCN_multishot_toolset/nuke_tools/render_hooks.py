@@ -9,18 +9,38 @@ Dynamic syncing and tab introspection have been removed to reduce complexity.
 Artists can adjust the whitelist in the wrapper and click Refresh to re-expose
 knobs as desired.
 """
+import operator
+import os
 import re
+import sys
 
-import nuke
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Sequence
-
-import gsv_utils
-
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Set
+
+try:
+    import nuke  # type: ignore
+except Exception:  # pragma: no cover - allow importing outside Nuke
+    nuke = None  # type: ignore
+
+
+# Knob classes and DAG helpers bound once; the promotion and management-tab
+# helpers call these per knob.
+_Tab_Knob = getattr(nuke, "Tab_Knob", None)
+_Link_Knob = getattr(nuke, "Link_Knob", None)
+_Text_Knob = getattr(nuke, "Text_Knob", None)
+_Boolean_Knob = getattr(nuke, "Boolean_Knob", None)
+_Int_Knob = getattr(nuke, "Int_Knob", None)
+_String_Knob = getattr(nuke, "String_Knob", None)
+_PyScript_Knob = getattr(nuke, "PyScript_Knob", None)
+_Enumeration_Knob = getattr(nuke, "Enumeration_Knob", None)
+_allNodes = getattr(nuke, "allNodes", None)
+_toNode = getattr(nuke, "toNode", None)
+_Undo = getattr(nuke, "Undo", None)
 
 # Knobs that should not be promoted because the VariableGroup already provides
-# its own versions or they are positional/housekeeping values.
-_RESERVED_KNOBS = {
+# its own versions or they are positional/housekeeping values. Names are
+# interned so set probes against Nuke's knob-name strings compare by identity.
+_RESERVED_KNOBS: FrozenSet[str] = frozenset(map(sys.intern, {
     "name",
     "label",
     "xpos",
@@ -38,10 +58,10 @@ _RESERVED_KNOBS = {
     "onCreate",
     "onDestroy",
     "node_class",
-}
+}))
 
 # Minimal default whitelist; artists can extend via the wrapper tab.
-_DEFAULT_WRITE_KNOBS: List[str] = [
+_DEFAULT_WRITE_KNOBS: List[str] = [sys.intern(n) for n in (
     "file",
     "file_type",
     "channels",
@@ -52,82 +72,319 @@ _DEFAULT_WRITE_KNOBS: List[str] = [
     "last",
     "use_limit",
     "create_directories",
-    "Render"
-]
+    "Render",
+)]
 
 _BCN_MANAGEMENT_TAB = "bcn_wrapper"
 _BCN_MANAGEMENT_LABEL = "BCN Wrapper"
 _WHITELIST_TOGGLE_PREFIX = "bcn_whitelist__"
 _SCREEN_SELECTOR_KNOB = "bcn_screen_selector"
+_SANITIZED_MARKER_KNOB = "bcn_sanitized_v1"
+_APPLIED_WHITELIST_KNOB = "bcn_applied_whitelist"
+_BCN_REFRESH_CMD = (
+    "import nuke\n"
+    "import render_hooks as rh\n"
+    "rh.refresh_variable_group_links(nuke.thisNode())\n"
+)
+# Runs on every knob change of the wrapper, so the changed knob is fetched once
+# and everything else is skipped unless it is the selector.
 _SCREEN_SELECTOR_CALLBACK_SNIPPET = (
+    "import nuke\n"
+    "_bcn_knob = nuke.thisKnob()\n"
+    f"if _bcn_knob is not None and _bcn_knob.name() == \"{_SCREEN_SELECTOR_KNOB}\":\n"
+    "    import render_hooks as rh\n"
+    "    rh._on_screen_selector_changed(nuke.thisNode(), _bcn_knob.value())\n"
+)
+# Unfenced snippet written by earlier versions; recognised so it is replaced.
+_LEGACY_SCREEN_SELECTOR_CALLBACK_SNIPPET = (
     "import nuke\n"
     f"if nuke.thisKnob() and nuke.thisKnob().name() == \"{_SCREEN_SELECTOR_KNOB}\":\n"
     "    import render_hooks as rh\n"
     "    rh._on_screen_selector_changed(nuke.thisNode(), nuke.thisKnob().value())\n"
 )
+# Marker comments fencing the snippet inside knobChanged, so the installed copy
+# is found with one substring search and can be replaced when the snippet moves.
+_SCREEN_SELECTOR_CALLBACK_BEGIN = "# >>> bcn screen selector\n"
+_SCREEN_SELECTOR_CALLBACK_END = "# <<< bcn screen selector\n"
+_SCREEN_SELECTOR_CALLBACK_BLOCK = (
+    _SCREEN_SELECTOR_CALLBACK_BEGIN + _SCREEN_SELECTOR_CALLBACK_SNIPPET + _SCREEN_SELECTOR_CALLBACK_END
+)
+
+# Knob classes whose value is never a string, so they cannot carry a legacy
+# "python:" prefix. Every other class is read and checked, as any string-valued
+# knob (File_Knob, Script_Knob, Multiline_String_Knob, ...) may hold one.
+_NON_STRING_CLASSES: FrozenSet[str] = frozenset({
+    "Tab_Knob",
+    "Boolean_Knob",
+    "Int_Knob",
+    "Double_Knob",
+    "Array_Knob",
+    "XY_Knob",
+    "XYZ_Knob",
+    "WH_Knob",
+    "UV_Knob",
+    "Scale_Knob",
+    "BBox_Knob",
+    "Box3_Knob",
+    "Color_Knob",
+    "AColor_Knob",
+    "Format_Knob",
+})
+
 _TOGGLE_TOOLTIP_PATTERN = re.compile(r"Expose the '([^']+)' knob")
 
+# Set BCN_SCREENS_DEBUG=1 before launching Nuke (or flip to True) to trace
+# knob promotion failures in the Script Editor. Off by default, so `_log`
+# returns before formatting or naming any node.
+_DEBUG = os.environ.get("BCN_SCREENS_DEBUG", "").strip().lower() not in ("", "0", "false", "no")
+
+# Session-invariant; terminal and farm sessions skip panel-opening calls.
+_IS_GUI = bool(getattr(nuke, "env", {}).get("gui"))
+_LOG_PREFIX = "[BCN render_hooks]"
+
+
+_gsv_mod = None
+
+
+def _gsv():
+    """Return `gsv_utils`, importing it on first use.
+
+    Only the screen selector needs it, so wrapping code that never reaches
+    that path does not import it (or install its script hooks).
+    """
+
+    global _gsv_mod
+    if _gsv_mod is None:
+        import gsv_utils as _gsv_mod
+    return _gsv_mod
+
+
+def _log(fmt: str, *args) -> None:
+    """Print a %-style debug message when `_DEBUG` is set.
+
+    Formatting only happens when enabled. Arguments that are zero-argument
+    callables are invoked at that point, so callers can defer node-name
+    queries, e.g. `_log("linked %s", lambda: _describe(node))`.
+    """
+
+    if not _DEBUG:
+        return
+    if args:
+        fmt = fmt % tuple(a() if callable(a) else a for a in args)
+    print(_LOG_PREFIX, fmt)
+
+
+def _warn(message: str) -> None:
+    """Report a failure regardless of `_DEBUG`, via Nuke's error console when available."""
+
+    warning = getattr(nuke, "warning", None)
+    if warning is not None:
+        try:
+            warning(f"{_LOG_PREFIX} {message}")
+            return
+        except Exception:
+            pass
+    print(_LOG_PREFIX, message)
+
+
+def _node_path(node: object, cache: Optional[Dict[int, str]] = None) -> str:
+    """Return `node`'s full DAG path, else its name, else "" if neither resolves.
+
+    `cache` is an optional per-pass memo keyed by `id(node)`; callers must only
+    share it while the nodes it names are alive and unrenamed.
+    """
+
+    if cache is not None:
+        cached = cache.get(id(node))
+        if cached is None:
+            cached = cache[id(node)] = _node_path(node)
+        return cached
+    for attr in ("fullName", "name"):
+        getter = getattr(node, attr, None)
+        if getter is None:
+            continue
+        try:
+            name = str(getter())
+        except Exception:
+            continue
+        if name:
+            return name
+    return ""
+
+
+def _describe(node: object, cache: Optional[Dict[int, str]] = None) -> str:
+    """Return a readable name for `node` for log text; never empty."""
+
+    return _node_path(node, cache) or str(node)
+
+
+def _class_of(node: object) -> str:
+    """Return `node.Class()`, or '' when the node has none or it fails."""
+
+    try:
+        return node.Class()
+    except Exception:
+        return ""
+
+
+def _empty_text(_knob: object) -> str:
+    """Getter used when a knob type lacks the requested attribute."""
+
+    return ""
+
+
+def _make_knob_getter(sample: object, attr_name: str):
+    """Return a getter for `attr_name`, specialised on how `sample` exposes it."""
+
+    member = getattr(sample, attr_name, None)
+    if member is None:
+        return _empty_text
+    if callable(member):
+        return operator.methodcaller(attr_name)
+    return operator.attrgetter(attr_name)
 
-def _sanitize_knob_scripts(node: object) -> None:
+
+# Per knob type: a getter specialised for that type's label/tooltip. Built the
+# first time a type is seen so later knobs of that type skip all probing.
+_LABEL_GETTERS: Dict[type, Callable[[object], str]] = {}
+_TOOLTIP_GETTERS: Dict[type, Callable[[object], str]] = {}
+
+
+def _get_label(knob: object) -> str:
+    """Return the knob's label ('' when its type has none)."""
+
+    getter = _LABEL_GETTERS.get(type(knob))
+    if getter is None:
+        getter = _LABEL_GETTERS[type(knob)] = _make_knob_getter(knob, "label")
+    return getter(knob)
+
+
+def _get_tooltip(knob: object) -> str:
+    """Return the knob's tooltip ('' when its type has none)."""
+
+    getter = _TOOLTIP_GETTERS.get(type(knob))
+    if getter is None:
+        getter = _TOOLTIP_GETTERS[type(knob)] = _make_knob_getter(knob, "tooltip")
+    return getter(knob)
+
+
+def _sanitize_knob_scripts(node: object) -> bool:
     """Remove legacy 'python:' prefixes from script-like knobs on a node.
 
     This cleans up older wrappers that may still carry script strings starting
     with 'python:' which cause SyntaxError on execution in modern Nuke.
+    Returns False if the knobs could not be listed or a prefix could not be
+    stripped, True otherwise.
     """
 
     try:
         knobs = getattr(node, "knobs")()
     except Exception:
-        return
-    for kname, knob in list(knobs.items()):
+        return False
+    clean = True
+    skip_classes = _NON_STRING_CLASSES
+    for knob in knobs.values():
+        # Numeric and structural knobs cannot hold a legacy prefix; skip them
+        # before paying for value().
         try:
-            # Only process knobs that can carry string values
-            if hasattr(knob, "value"):
-                val = knob.value()
-            else:
-                continue
-            if not isinstance(val, str):
+            if knob.Class() in skip_classes:
                 continue
-            txt = val.lstrip()
-            if txt.startswith("python:"):
-                # Drop only the leading prefix label
-                cleaned = txt[len("python:"):].lstrip("\n\r ")
-                knob.setValue(cleaned)
+            val = knob.value()
         except Exception:
             continue
+        if not isinstance(val, str) or "python:" not in val:
+            continue
+        txt = val.lstrip()
+        if txt.startswith("python:"):
+            # Drop only the leading prefix label
+            try:
+                knob.setValue(txt[len("python:"):].lstrip("\n\r "))
+            except Exception:
+                clean = False
+    return clean
 
 
-def _sanitize_group_knob_scripts(group: object) -> None:
-    """Sanitize script-like knobs on the wrapper and all internal nodes.
+def _sanitize_group_knob_scripts(group: object) -> bool:
+    """Sanitize script-like knobs on `group` and, for groups, all internal nodes.
 
-    Removes legacy "python:" prefixes that can cause SyntaxError.
+    Removes legacy "python:" prefixes that can cause SyntaxError. Returns True
+    only when every node was walked and cleaned without error.
     """
 
-    # Sanitize the wrapper itself
+    # Sanitize the node itself
     try:
-        _sanitize_knob_scripts(group)
+        clean = _sanitize_knob_scripts(group)
     except Exception:
-        pass
+        clean = False
+    # Only groups can be entered; a plain node has no internals to walk.
+    if not hasattr(group, "__enter__"):
+        return clean
     # Sanitize internal nodes (recurse into subgroups)
     try:
         with group:
-            for n in list(nuke.allNodes(recurse=True)):  # type: ignore[attr-defined]
+            for n in _allNodes(recurse=True):
                 try:
-                    _sanitize_knob_scripts(n)
+                    if not _sanitize_knob_scripts(n):
+                        clean = False
                 except Exception:
-                    continue
+                    clean = False
+    except Exception:
+        clean = False
+    return clean
+
+
+def _mark_sanitized(group: object) -> None:
+    """Tag the wrapper with a hidden marker knob recording it is clean."""
+
+    # Park the marker on the management tab so it doesn't spawn a "User" tab.
+    try:
+        _ensure_tab(group, _BCN_MANAGEMENT_TAB, _BCN_MANAGEMENT_LABEL)
+        marker = _Int_Knob(_SANITIZED_MARKER_KNOB, "")
+        marker.setValue(1)
+        marker.setFlag(nuke.INVISIBLE)
+        group.addKnob(marker)
     except Exception:
         pass
 
 
-def _ensure_tab(group: object, name: str, label: str):
-    """Ensure a `Tab_Knob` with the given name exists on the group."""
+def migrate_legacy_wrapper(group: object) -> None:
+    """Strip legacy "python:" prefixes from a pre-existing wrapper, once.
 
-    knobs = getattr(group, "knobs")()
-    if name in knobs:
-        return knobs[name]
-    tab = nuke.Tab_Knob(name, label)  # type: ignore[attr-defined]
+    The wrapper is tagged with a hidden marker knob only after a clean pass,
+    so later calls skip the recursive walk entirely; a pass that hit errors
+    leaves it untagged to be retried on the next Refresh.
+    """
+
+    if nuke is None:
+        return
+    try:
+        if group.knob(_SANITIZED_MARKER_KNOB) is not None:
+            return
+    except Exception:
+        pass
+    if _sanitize_group_knob_scripts(group):
+        _mark_sanitized(group)
+
+
+def _ensure_tab(group: object, name: str, label: str, existing: Optional[Set[str]] = None):
+    """Ensure a `Tab_Knob` with the given name exists on the group.
+
+    When `existing` (a snapshot of the group's knob names) is given it is used
+    for the membership test and updated in place instead of calling `knobs()`.
+    """
+
+    if nuke is None:
+        return None
+    if existing is None:
+        tab = getattr(group, "knobs")().get(name)
+        if tab is not None:
+            return tab
+    elif name in existing:
+        return group[name]
+    tab = _Tab_Knob(name, label)
     group.addKnob(tab)
+    if existing is not None:
+        existing.add(name)
     return tab
 
 
@@ -154,8 +411,7 @@ def _activate_tab(group: object, name: str) -> bool:
         except Exception:
             pass
     try:
-        ordered = list(knobs.values())
-        for idx, knob in enumerate(ordered):
+        for idx, knob in enumerate(knobs.values()):
             try:
                 if knob.Class() == "Tab_Knob" and knob.name() == name:
                     set_tab(idx)
@@ -167,48 +423,79 @@ def _activate_tab(group: object, name: str) -> bool:
     return False
 
 
-def _add_link_knob(group: object, src_node: object, name: str, label: Optional[str]) -> bool:
+def _add_link_knob(
+    group: object,
+    src_node: object,
+    name: str,
+    label: Optional[str],
+    existing: Optional[Set[str]] = None,
+    link_cls=None,
+    src_knobs: Optional[Dict[str, object]] = None,
+    names: Optional[Dict[int, str]] = None,
+) -> bool:
     """Create a `Link_Knob` on `group` that targets `src_node[name]`.
 
+    `existing` is the caller's snapshot of knob names already on `group`; it is
+    updated in place so a promotion loop never rebuilds `group.knobs()`.
+    `src_knobs` is likewise an optional snapshot of `src_node.knobs()`, and
+    `names` a `_node_path` memo for the string-linking fallback.
     Returns True if a link was added, False otherwise.
     """
 
+    if nuke is None:
+        return False
+    name = sys.intern(name)
     if name in _RESERVED_KNOBS:
         return False
-    if name in group.knobs():
+    if existing is None:
+        existing = set(group.knobs())
+    if name in existing:
         return False
-    if name not in getattr(src_node, "knobs")():
+    if src_knobs is None:
+        src_knobs = getattr(src_node, "knobs")()
+    if name not in src_knobs:
         return False
-    link = nuke.Link_Knob(name, label or name)  # type: ignore[attr-defined]
+    link = (link_cls or _Link_Knob)(name, label or name)
     # Try linking by object; fallback to string-based linking.
-    made = False
     try:
         link.makeLink(src_node, name)
-        made = True
     except TypeError:
-        pass
-    if not made:
-        node_name: Optional[str] = None
-        try:
-            if hasattr(src_node, "fullName"):
-                node_name = str(src_node.fullName())
-        except Exception:
-            node_name = None
-        if not node_name:
-            try:
-                if hasattr(src_node, "name"):
-                    node_name = str(src_node.name())
-            except Exception:
-                node_name = None
-        if node_name:
-            link.makeLink(node_name, name)
-            made = True
-    if not made:
-        return False
+        path = _node_path(src_node, names)
+        if not path:
+            return False
+        link.makeLink(path, name)
     group.addKnob(link)
+    existing.add(name)
     return True
 
 
+def _extract_labels(
+    write_node: object, names: Sequence[str], knobs: Optional[Dict[str, object]] = None
+) -> Dict[str, str]:
+    """Read each named knob's label once; missing knobs map to an empty label."""
+
+    if knobs is None:
+        knobs = getattr(write_node, "knobs")()
+    get_label = _get_label
+    labels: Dict[str, str] = {}
+    for name in names:
+        knob = knobs.get(name)
+        try:
+            labels[name] = (get_label(knob) or "") if knob is not None else ""
+        except Exception:
+            labels[name] = ""
+    return labels
+
+
+def _promotion_failed(
+    write_node: object, name: str, exc: Exception, names: Optional[Dict[int, str]] = None
+) -> bool:
+    """Cold path for failed promotions: warn and skip the knob."""
+
+    _warn(f"Could not link knob {name!r} from {_describe(write_node, names)}: {exc!r}")
+    return False
+
+
 def _toggle_knob_name(knob_name: str) -> str:
     """Return a stable Boolean knob name for a write knob entry."""
 
@@ -216,17 +503,11 @@ def _toggle_knob_name(knob_name: str) -> str:
     return f"{_WHITELIST_TOGGLE_PREFIX}{safe}"
 
 
-def _label_for_write_knob(write_node: object, knob_name: str) -> str:
-    """Derive a user-facing label for a write knob checkbox."""
+def _label_for_write_knob(knob_name: str, label: str = "") -> str:
+    """Derive a user-facing checkbox label, prettifying the name if `label` is empty."""
 
-    try:
-        knob = write_node[knob_name]
-        if hasattr(knob, "label"):
-            label = knob.label()
-            if label:
-                return label
-    except Exception:
-        pass
+    if label:
+        return label
     pretty = knob_name.replace("_", " ").strip()
     return pretty.title() if pretty else knob_name
 
@@ -242,8 +523,7 @@ def _original_name_from_toggle(toggle_name: str, toggle: object) -> str:
 
     tooltip = ""
     try:
-        if hasattr(toggle, "tooltip"):
-            tooltip = toggle.tooltip() or ""
+        tooltip = _get_tooltip(toggle) or ""
     except Exception:
         tooltip = ""
     match = _TOGGLE_TOOLTIP_PATTERN.search(tooltip)
@@ -254,42 +534,57 @@ def _original_name_from_toggle(toggle_name: str, toggle: object) -> str:
     return raw.replace("__", "_")
 
 
-def _ensure_management_tab(group: object, knob_order: Sequence[str], write_node: object) -> None:
-    """Add/update the BCN wrapper tab with checkbox whitelist and refresh button."""
+def _ensure_management_tab(
+    group: object,
+    knob_order: Sequence[str],
+    labels: Dict[str, str],
+    knobs: Optional[Dict[str, object]] = None,
+) -> None:
+    """Add/update the BCN wrapper tab with checkbox whitelist and refresh button.
 
-    _ensure_tab(group, _BCN_MANAGEMENT_TAB, _BCN_MANAGEMENT_LABEL)
-    _activate_tab(group, _BCN_MANAGEMENT_TAB)
+    `knobs` is an optional snapshot of `group.knobs()`; it is updated in place
+    with every knob added here so callers can keep using it afterwards.
+    """
 
-    knobs = getattr(group, "knobs")()
+    if nuke is None:
+        return
+    if knobs is None:
+        knobs = getattr(group, "knobs")()
+    if _BCN_MANAGEMENT_TAB not in knobs:
+        tab = _Tab_Knob(_BCN_MANAGEMENT_TAB, _BCN_MANAGEMENT_LABEL)
+        group.addKnob(tab)
+        knobs[_BCN_MANAGEMENT_TAB] = tab
+    _activate_tab(group, _BCN_MANAGEMENT_TAB)
 
     csv_selected: Optional[set] = None
     legacy_name = "bcn_knob_whitelist"
-    if legacy_name in knobs:
+    legacy = knobs.pop(legacy_name, None)
+    if legacy is not None:
         try:
-            raw = knobs[legacy_name].value()
+            raw = legacy.value()
             if isinstance(raw, str) and raw.strip():
                 csv_selected = {s.strip() for s in raw.split(",") if s.strip()}
         except Exception:
             csv_selected = None
         try:
-            group.removeKnob(knobs[legacy_name])
+            group.removeKnob(legacy)
         except Exception:
             pass
-        knobs.pop(legacy_name, None)
 
     if "bcn_label" not in knobs:
-        label = nuke.Text_Knob("bcn_label", "Write knob whitelist")  # type: ignore[attr-defined]
+        label = _Text_Knob("bcn_label", "Write knob whitelist")
         label.setTooltip("Toggle which internal Write knobs should be exposed on the wrapper's Write tab.")
         group.addKnob(label)
+        knobs["bcn_label"] = label
 
     keep_names = set()
     for knob_name in knob_order:
         toggle_name = _toggle_knob_name(knob_name)
         keep_names.add(toggle_name)
-        label = _label_for_write_knob(write_node, knob_name)
+        label = _label_for_write_knob(knob_name, labels.get(knob_name, ""))
         existing = knobs.get(toggle_name)
         if existing is None:
-            toggle = nuke.Boolean_Knob(toggle_name, label)  # type: ignore[attr-defined]
+            toggle = _Boolean_Knob(toggle_name, label)
             toggle.setTooltip(_whitelist_tooltip(knob_name))
             if csv_selected is not None:
                 toggle.setValue(knob_name in csv_selected)
@@ -298,9 +593,14 @@ def _ensure_management_tab(group: object, knob_order: Sequence[str], write_node:
             group.addKnob(toggle)
             knobs[toggle_name] = toggle
         else:
+            # Read before write: re-setting an unchanged label or tooltip still
+            # marks the knob modified and redraws the panel.
             try:
-                existing.setLabel(label)
-                existing.setTooltip(_whitelist_tooltip(knob_name))
+                if _get_label(existing) != label:
+                    existing.setLabel(label)
+                tooltip = _whitelist_tooltip(knob_name)
+                if _get_tooltip(existing) != tooltip:
+                    existing.setTooltip(tooltip)
                 if csv_selected is not None:
                     existing.setValue(knob_name in csv_selected)
                 existing.setVisible(True)
@@ -308,26 +608,25 @@ def _ensure_management_tab(group: object, knob_order: Sequence[str], write_node:
                 pass
 
     # Hide any stale toggles that are no longer applicable
-    for name, knob in list(knobs.items()):
+    for name, knob in knobs.items():
         if name.startswith(_WHITELIST_TOGGLE_PREFIX) and name not in keep_names:
             try:
                 knob.setVisible(False)
             except Exception:
                 pass
 
-    cmd = (
-        "import nuke\n"
-        "import BCN_multishot_toolset.nuke_tools.render_hooks as rh\n"
-        "rh.refresh_variable_group_links(nuke.thisNode())\n"
-    )
-    if "bcn_refresh" not in knobs:
-        button = nuke.PyScript_Knob("bcn_refresh", "Refresh Links")  # type: ignore[attr-defined]
-        button.setCommand(cmd)
+    button = knobs.get("bcn_refresh")
+    if button is None:
+        button = _PyScript_Knob("bcn_refresh", "Refresh Links")
+        button.setCommand(_BCN_REFRESH_CMD)
         button.setTooltip("Rebuild the Write tab links using the enabled checkboxes above")
         group.addKnob(button)
+        knobs["bcn_refresh"] = button
     else:
+        # Only rewrite the command when it predates the current one.
         try:
-            knobs["bcn_refresh"].setCommand(cmd)
+            if button.value() != _BCN_REFRESH_CMD:
+                button.setCommand(_BCN_REFRESH_CMD)
         except Exception:
             pass
 
@@ -343,19 +642,33 @@ def _get_group_screen(group: object) -> Optional[str]:
 
 
 def _set_group_screen(group: object, screen: Optional[str]) -> None:
-    """Assign `screen` to the VariableGroup-local GSV."""
+    """Assign `screen` to the VariableGroup-local GSV.
+
+    The write is skipped when the wrapper already holds `screen`, so re-picking
+    the same entry does not dirty the wrapper.
+    """
 
     if not screen:
         return
+    screen = str(screen)
     try:
         gsv = group["gsv"]
-        gsv.setGsvValue("__default__.screens", str(screen))
+        if gsv.getGsvValue("__default__.screens") == screen:
+            return
+        gsv.setGsvValue("__default__.screens", screen)
     except Exception:
         pass
 
 
 def _install_screen_selector_callback(group: object) -> None:
-    """Ensure the knobChanged script updates the local screen when selector changes."""
+    """Ensure the knobChanged script updates the local screen when selector changes.
+
+    The snippet is fenced by marker comments. An up-to-date block is left
+    alone, an outdated fenced block is replaced in place, and an unfenced copy
+    from older wrappers is fenced instead of being appended a second time.
+    A begin marker without a matching end marker is never replaced, since that
+    would discard whatever follows it; the block is appended instead.
+    """
 
     try:
         script_knob = group["knobChanged"]
@@ -366,23 +679,33 @@ def _install_screen_selector_callback(group: object) -> None:
     except Exception:
         current = ""
     current = current or ""
-    if _SCREEN_SELECTOR_CALLBACK_SNIPPET in current:
+    block = _SCREEN_SELECTOR_CALLBACK_BLOCK
+    if block in current:
         return
-    new_script = current.rstrip()
-    if new_script and not new_script.endswith("\n"):
-        new_script += "\n"
-    new_script += _SCREEN_SELECTOR_CALLBACK_SNIPPET
+    start = current.find(_SCREEN_SELECTOR_CALLBACK_BEGIN)
+    end = current.find(_SCREEN_SELECTOR_CALLBACK_END, start) if start >= 0 else -1
+    if end >= 0:
+        end += len(_SCREEN_SELECTOR_CALLBACK_END)
+        new_script = current[:start] + block + current[end:]
+    elif _LEGACY_SCREEN_SELECTOR_CALLBACK_SNIPPET in current:
+        new_script = current.replace(_LEGACY_SCREEN_SELECTOR_CALLBACK_SNIPPET, block, 1)
+    else:
+        new_script = current.rstrip()
+        if new_script and not new_script.endswith("\n"):
+            new_script += "\n"
+        new_script += block
     try:
         script_knob.setValue(new_script)
     except Exception:
         pass
 
 
-def _ensure_screen_selector(group: object) -> None:
+def _ensure_screen_selector(group: object, knobs: Optional[Dict[str, object]] = None) -> None:
     """Add/update the Write tab pulldown for selecting the local screen."""
 
-    screens = gsv_utils.get_list_options("__default__.screens")
-    knobs = getattr(group, "knobs")()
+    screens = _gsv().get_screen_options()
+    if knobs is None:
+        knobs = getattr(group, "knobs")()
     selector = knobs.get(_SCREEN_SELECTOR_KNOB)
     if not screens:
         if selector is not None:
@@ -393,26 +716,28 @@ def _ensure_screen_selector(group: object) -> None:
         return
 
     if selector is None:
-        selector = nuke.Enumeration_Knob(_SCREEN_SELECTOR_KNOB, "Screen", screens)  # type: ignore[attr-defined]
+        selector = _Enumeration_Knob(_SCREEN_SELECTOR_KNOB, "Screen", screens)
         selector.setTooltip("Select which screen this VariableGroup should render with. Only this node is affected.")
         group.addKnob(selector)
         knobs[_SCREEN_SELECTOR_KNOB] = selector
     else:
+        # Only rebuild the pulldown menu when the screen list actually moved.
         try:
-            selector.setValues(screens)
+            if list(selector.values()) != screens:
+                selector.setValues(screens)
         except Exception:
             return
         selector.setVisible(True)
 
     current = _get_group_screen(group)
     if not current or current not in screens:
-        fallback = gsv_utils.get_current_screen() or (screens[0] if screens else None)
+        fallback = _gsv().get_current_screen() or (screens[0] if screens else None)
         if fallback:
             current = fallback
             _set_group_screen(group, current)
 
     try:
-        if current:
+        if current and selector.value() != current:
             selector.setValue(current)
     except Exception:
         pass
@@ -456,17 +781,18 @@ class WriteKnobPromoter:
 
         selected: List[str] = []
         any_toggle = False
-        for name, knob in list(knobs_map.items()):
-            if not name.startswith(_WHITELIST_TOGGLE_PREFIX):
+        prefix = _WHITELIST_TOGGLE_PREFIX
+        for name, knob in knobs_map.items():
+            if not name.startswith(prefix):
                 continue
             any_toggle = True
             try:
-                enabled = bool(knob.value())
+                enabled = knob.value()
             except Exception:
-                enabled = False
-            original = _original_name_from_toggle(name, knob)
+                continue
+            # Only enabled toggles need their tooltip read and parsed.
             if enabled:
-                selected.append(original)
+                selected.append(_original_name_from_toggle(name, knob))
         if any_toggle:
             return selected
         return None
@@ -483,44 +809,113 @@ class WriteKnobPromoter:
             ft = None
         if ft and self.cfg.per_filetype_knobs and ft in self.cfg.per_filetype_knobs:
             return self.cfg.per_filetype_knobs[ft]
-        return list(self.cfg.default_knobs)
+        # Callers only iterate the list, so the shared default needs no copy.
+        return self.cfg.default_knobs
 
-    def expose(self, group: object, write_node: object) -> int:
+    def expose(self, group: object, write_node: object, knob_order: Optional[List[str]] = None) -> int:
         """Expose selected knobs onto the VariableGroup under the Write tab.
 
         Also ensures the BCN management tab exists. Returns the number of links added.
+        `knob_order` may be passed when the caller already resolved it.
         """
 
-        knob_order = self._knob_list_for(group, write_node)
-        _ensure_management_tab(group, knob_order, write_node)
-        _ensure_tab(group, self.cfg.write_tab_label, self.cfg.write_tab_label)
+        # One knobs() snapshot of the Write serves the label pass and every
+        # link's presence check.
+        src_knobs = write_node.knobs()
+        if knob_order is None:
+            knob_order = self._knob_list_for(group, write_node)
+        labels = _extract_labels(write_node, knob_order, src_knobs)
+        # Snapshot the wrapper's knobs once; helpers below keep it current.
+        knobs = group.knobs()
+        _ensure_management_tab(group, knob_order, labels, knobs)
+        existing = set(knobs)
+        _ensure_tab(group, self.cfg.write_tab_label, self.cfg.write_tab_label, existing)
         _activate_tab(group, self.cfg.write_tab_label)
-        _ensure_screen_selector(group)
-
+        _ensure_screen_selector(group, knobs)
+        existing.add(_SCREEN_SELECTOR_KNOB)
+
+        link_cls = _Link_Knob
+        reserved = _RESERVED_KNOBS
+        # Node names resolved at most once per pass, should linking fall back
+        # to paths; nodes are neither freed nor renamed while it runs.
+        names: Dict[int, str] = {}
         added = 0
         for name in knob_order:
-            label = None
+            if name in reserved:
+                continue
             try:
-                k = write_node[name]
-                label = k.label() if hasattr(k, "label") else name
-            except Exception:
-                label = name
-            if _add_link_knob(group, write_node, name, label):
+                linked = _add_link_knob(
+                    group, write_node, name, labels.get(name) or name, existing, link_cls, src_knobs, names
+                )
+            except Exception as exc:
+                linked = _promotion_failed(write_node, name, exc, names)
+            if linked:
                 added += 1
 
-        if self.cfg.show_scope_on_label:
-            try:
-                group["label"].setValue("[value gsv]")
-            except Exception:
-                pass
-        if self.cfg.tile_color is not None:
-            try:
-                group["tile_color"].setValue(self.cfg.tile_color)
-            except Exception:
-                pass
+        try:
+            label_knob = knobs.get("label")
+            if self.cfg.show_scope_on_label and label_knob is not None:
+                label_knob.setValue("[value gsv]")
+            tile_knob = knobs.get("tile_color")
+            if self.cfg.tile_color is not None and tile_knob is not None:
+                tile_knob.setValue(self.cfg.tile_color)
+        except Exception as exc:
+            _log("Could not style %s: %r", lambda: _describe(group), exc)
+        _set_applied_whitelist(group, knob_order, knobs)
         return added
 
 
+def _applied_whitelist(group: object) -> Optional[str]:
+    """Return the whitelist recorded by the last `expose`, if any."""
+
+    try:
+        knob = group.knob(_APPLIED_WHITELIST_KNOB)
+        return knob.value() if knob is not None else None
+    except Exception:
+        return None
+
+
+def _links_present(group: object, target: object, knob_order: Sequence[str]) -> bool:
+    """True when every whitelisted knob `target` has is present on `group`.
+
+    Catches links deleted by hand and knobs that failed to promote (or were
+    missing) when the whitelist was recorded.
+    """
+
+    reserved = _RESERVED_KNOBS
+    try:
+        for name in knob_order:
+            if name in reserved:
+                continue
+            if target.knob(name) is not None and group.knob(name) is None:
+                return False
+    except Exception:
+        return False
+    return True
+
+
+def _set_applied_whitelist(group: object, knob_order: Sequence[str], knobs: Dict[str, object]) -> None:
+    """Record `knob_order` on a hidden knob so unchanged refreshes can be skipped."""
+
+    value = ",".join(knob_order)
+    try:
+        knob = knobs.get(_APPLIED_WHITELIST_KNOB)
+        if knob is None:
+            knob = _String_Knob(_APPLIED_WHITELIST_KNOB, "")
+            knob.setFlag(nuke.INVISIBLE)
+            group.addKnob(knob)
+            knobs[_APPLIED_WHITELIST_KNOB] = knob
+        if knob.value() != value:
+            knob.setValue(value)
+    except Exception as exc:
+        _log("Could not record whitelist on %s: %r", lambda: _describe(group), exc)
+
+
+# The config is frozen and the promoter keeps no per-call state, so one shared
+# instance serves every wrap and Refresh.
+_DEFAULT_PROMOTER = WriteKnobPromoter(WritePromoteConfig(default_knobs=_DEFAULT_WRITE_KNOBS))
+
+
 def _find_internal_node(group: object, prefer_publish_instance: bool = False, original_name: Optional[str] = None) -> Optional[object]:
     """Find the internal node to promote from, preferring Write or publishable.
 
@@ -528,49 +923,64 @@ def _find_internal_node(group: object, prefer_publish_instance: bool = False, or
     inside the group is preferred over a plain Write node.
     """
 
+    if nuke is None:
+        return None
     try:
         with group:
             # Prefer lookup by original name when provided
             if original_name:
                 try:
-                    named = nuke.toNode(original_name)
+                    named = _toNode(original_name)
                     if named is not None:
                         return named
                 except Exception:
                     pass
-            nodes = list(nuke.allNodes(recurse=False))  # type: ignore[attr-defined]
-            if prefer_publish_instance:
-                for node in nodes:
-                    try:
-                        if "publish_instance" in node.knobs():
-                            return node
-                    except Exception:
-                        continue
-            for node in nodes:
+            # Single pass: stop at the preferred match, otherwise remember the
+            # first Write and the first node as fallbacks.
+            write_hit = None
+            fallback = None
+            for node in _allNodes(recurse=False):
+                if fallback is None:
+                    fallback = node
                 try:
-                    if node.Class() == "Write":
+                    # knob() is a single lookup; knobs() would build the whole dict.
+                    if prefer_publish_instance and node.knob("publish_instance") is not None:
                         return node
+                    if write_hit is None and node.Class() == "Write":
+                        if not prefer_publish_instance:
+                            return node
+                        write_hit = node
                 except Exception:
                     continue
-            return nodes[0] if nodes else None
+            return write_hit or fallback
     except Exception:
         return None
 
 
+def _clear_selection(selected: Sequence[object]) -> None:
+    """Deselect the nodes in `selected`, leaving every other node untouched."""
+
+    for other in selected:
+        try:
+            other.setSelected(False)
+        except Exception:
+            pass
+
+
 def _collapse_into_variable_group(node: object) -> Optional[object]:
     """Collapse the given node into a new VariableGroup and return it."""
 
+    if nuke is None:
+        return None
     try:
-        previous_selection = list(nuke.selectedNodes())  # type: ignore[attr-defined]
+        previous_selection = nuke.selectedNodes()  # type: ignore[attr-defined]
     except Exception:
         previous_selection = []
     try:
-        for other in previous_selection:
-            try:
-                other.setSelected(False)
-            except Exception:
-                pass
-        node.setSelected(True)
+        # The usual case is `node` being the only selected node already.
+        if len(previous_selection) != 1 or previous_selection[0] is not node:
+            _clear_selection(previous_selection)
+            node.setSelected(True)
         vg = nuke.collapseToVariableGroup()  # type: ignore[attr-defined]
     except Exception:
         vg = None
@@ -596,6 +1006,8 @@ def refresh_variable_group_links(group: Optional[object] = None) -> int:
     Returns the number of links added.
     """
 
+    if nuke is None:
+        return 0
     g = group
     if g is None:
         try:
@@ -605,54 +1017,58 @@ def refresh_variable_group_links(group: Optional[object] = None) -> int:
                 g = nuke.selectedNode()  # type: ignore[attr-defined]
             except Exception:
                 return 0
-    # Sanitize any legacy script prefixes before proceeding
+    if _class_of(g) != "VariableGroup":
+        return 0
+    # Sanitize any legacy script prefixes before proceeding; a no-op once the
+    # wrapper carries the sanitized marker.
     try:
-        _sanitize_group_knob_scripts(g)
+        migrate_legacy_wrapper(g)
     except Exception:
         pass
-    try:
-        klass = g.Class()
-    except Exception:
-        return 0
-    if klass != "VariableGroup":
-        return 0
 
     target = _find_internal_node(g)
     if target is None:
         return 0
-    promoter = WriteKnobPromoter(WritePromoteConfig(default_knobs=_DEFAULT_WRITE_KNOBS))
-    return promoter.expose(g, target)
-
-    # Removed legacy introspection-based promotion
-
-
-    # Replaced by simplified _find_internal_node above
-
-
-    # Replaced by simplified _collapse_into_variable_group above
+    promoter = _DEFAULT_PROMOTER
+    knob_order = promoter._knob_list_for(g, target)
+    if _applied_whitelist(g) == ",".join(knob_order) and _links_present(g, target, knob_order):
+        # Links already match the whitelist. The management tab is still
+        # brought up to date (toggle labels, Refresh command from older
+        # versions), as is the screen list.
+        knobs = g.knobs()
+        _ensure_management_tab(g, knob_order, _extract_labels(target, knob_order), knobs)
+        _activate_tab(g, promoter.cfg.write_tab_label)
+        _ensure_screen_selector(g, knobs)
+        return 0
+    return promoter.expose(g, target, knob_order)
 
 
 def _on_screen_selector_changed(group: Optional[object], selection) -> None:
     """Callback for the Write tab screen selector to update the local GSV."""
 
-    if group is None:
+    if nuke is None or group is None:
+        return
+    # The knobChanged snippet passes the Enumeration value, i.e. the screen name.
+    if selection and isinstance(selection, str):
+        _set_group_screen(group, selection)
         return
     value = selection
     if isinstance(value, (list, tuple)):
         value = value[0] if value else None
+    # Resolve the selector knob at most once for the index/empty fallbacks.
+    try:
+        knob = group.knob(_SCREEN_SELECTOR_KNOB)
+    except Exception:
+        knob = None
     if isinstance(value, (int, float)):
         try:
-            knob = group[_SCREEN_SELECTOR_KNOB]
-            if hasattr(knob, "values"):
-                options = knob.values()
-                idx = int(value)
-                if 0 <= idx < len(options):
-                    value = options[idx]
+            options = knob.values()
+            idx = int(value)
+            value = options[idx] if 0 <= idx < len(options) else value
         except Exception:
             value = None
-    if not value:
+    if not value and knob is not None:
         try:
-            knob = group[_SCREEN_SELECTOR_KNOB]
             value = knob.value()
         except Exception:
             value = None
@@ -668,6 +1084,8 @@ def encapsulate_write_with_variable_group(node: Optional[object] = None) -> Opti
     - A "BCN Wrapper" tab with checkbox whitelist controls and a Refresh button
     """
 
+    if nuke is None:
+        return None
     target = node
     if target is None:
         try:
@@ -676,26 +1094,27 @@ def encapsulate_write_with_variable_group(node: Optional[object] = None) -> Opti
             nuke.message("Select a Write node first")
             return None
 
-    prefer_publish = False
-
-    try:
-        node_class = target.Class()
-    except Exception:
+    node_class = _class_of(target)
+    if not node_class:
         nuke.message("Unable to determine node class")
         return None
 
-    try:
-        has_publish_knob = "publish_instance" in target.knobs()
-    except Exception:
-        has_publish_knob = False
-
-    if node_class != "Write" and not (node_class == "Group" and has_publish_knob):
+    # Only Groups need the knob query; Writes and everything else decide on class.
+    if node_class == "Write":
+        prefer_publish = False
+    elif node_class == "Group":
+        try:
+            has_publish_knob = target.knob("publish_instance") is not None
+        except Exception:
+            has_publish_knob = False
+        if not has_publish_knob:
+            nuke.message("Select a Write node or a Group with a publish_instance knob")
+            return None
+        prefer_publish = True
+    else:
         nuke.message("Select a Write node or a Group with a publish_instance knob")
         return None
 
-    if node_class == "Group" and has_publish_knob:
-        prefer_publish = True
-
     # Capture the original name to keep clarity inside the wrapper.
     original_name = "Write"
     try:
@@ -707,18 +1126,16 @@ def encapsulate_write_with_variable_group(node: Optional[object] = None) -> Opti
     except Exception:
         pass
 
-    undo = getattr(nuke, "Undo", None)
+    undo = _Undo
     if undo is not None:
         try:
             undo.begin("Encapsulate Write in VariableGroup")
         except Exception:
             undo = None
 
-    # Sanitize any legacy script prefixes on the source node before collapsing
-    try:
-        _sanitize_knob_scripts(target)
-    except Exception:
-        pass
+    # Only the source can carry legacy script prefixes; clean it (and its
+    # children, for publish Groups) before collapsing.
+    source_clean = _sanitize_group_knob_scripts(target)
 
     try:
         group = _collapse_into_variable_group(target)
@@ -730,11 +1147,11 @@ def encapsulate_write_with_variable_group(node: Optional[object] = None) -> Opti
         except Exception:
             pass
 
-        # Sanitize any legacy script prefixes to avoid SyntaxError before lookups
-        try:
-            _sanitize_group_knob_scripts(group)
-        except Exception:
-            pass
+        # Everything inside a fresh wrapper was cleaned above or written by
+        # this module, so record that Refresh has nothing to migrate, unless
+        # cleaning the source hit errors and should be retried on Refresh.
+        if source_clean:
+            _mark_sanitized(group)
 
         promote_target = _find_internal_node(group, prefer_publish_instance=prefer_publish, original_name=original_name)
         if promote_target is None:
@@ -747,26 +1164,14 @@ def encapsulate_write_with_variable_group(node: Optional[object] = None) -> Opti
         except Exception:
             pass
 
-        promoter = WriteKnobPromoter(WritePromoteConfig(default_knobs=_DEFAULT_WRITE_KNOBS))
-        promoter.expose(group, promote_target)
+        # expose() also sets the `[value gsv]` label and tile colour.
+        _DEFAULT_PROMOTER.expose(group, promote_target)
 
-        # Show the active variable scope directly on the wrapper label.
-        try:
-            label_knob = group["label"]
-            label_knob.setValue("[value gsv]")
-        except Exception:
-            pass
-        
-        try:
-            tile_color_knob = group["tile_color"]
-            tile_color_knob.setValue(4290838783)
-        except Exception:
-            pass
-
-        try:
-            group.showControlPanel()
-        except Exception:
-            pass
+        if _IS_GUI:
+            try:
+                group.showControlPanel()
+            except Exception:
+                pass
 
         return group
     finally:
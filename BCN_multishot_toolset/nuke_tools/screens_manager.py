@@ -7,7 +7,7 @@ Provides a minimal dockable Qt panel to:
 - optionally create a `VariableSwitch` preview node
 
 This keeps to expressions/VariableSwitch/Link nodes and avoids generic
-callbacks; when a callback is required, prefer `nuke.callbacks.onGsvSetChanged`.
+callbacks; when a callback is required, use `gsv_utils.add_gsv_change_callback`.
 """
 
 from typing import List, Optional, Sequence
@@ -40,6 +40,29 @@ except Exception:  # pragma: no cover
 
 import gsv_utils
 
+# Session-invariant; terminal and farm sessions have no panel to update.
+_IS_GUI = bool(getattr(nuke, "env", {}).get("gui"))
+# Set only once the process-wide GSV change handler is actually registered.
+# Read back from globals() so reloading this module does not register a
+# second handler.
+_GSV_CALLBACK_INSTALLED: bool = globals().get("_GSV_CALLBACK_INSTALLED", False)
+
+
+def _on_gsv_changed(*_args, **_kwargs) -> None:
+    """Forward root GSV changes to the live panel, if there is one.
+
+    Looked up through the module globals at call time, so after a reload the
+    handler registered by the first import reaches the reloaded class.
+    """
+
+    inst = getattr(ScreensManagerPanel, "instance", None)
+    if inst is None:
+        return
+    try:
+        inst._schedule_reload()
+    except Exception:
+        pass
+
 
 if QtWidgets is None:
     class ScreensManagerPanel(object):  # type: ignore[misc]
@@ -66,6 +89,11 @@ else:
         # Singleton-style handle so other modules can poke the UI when needed
         instance: Optional["ScreensManagerPanel"] = None
 
+        # Last `__default__.screens` value read from or written to the root GSV
+        _last_applied_screen: Optional[str] = None
+        # True while a coalesced `_load_from_gsv` is queued on the event loop
+        _reload_pending: bool = False
+
         def __init__(self, parent=None) -> None:  # noqa: D401
             super().__init__(parent)
             self.setWindowTitle("Screens Manager")
@@ -160,6 +188,10 @@ else:
             finally:
                 if not emit_signal:
                     combo.blockSignals(False)
+            if not emit_signal:
+                # The combo moved without writing the GSV, so the last written
+                # value no longer describes it; the next selection must write.
+                self._last_applied_screen = None
 
         def _install_logo_pixmap(self) -> None:
             """Load and set the banner logo pixmap if available.
@@ -201,16 +233,29 @@ else:
 
         def _load_from_gsv(self) -> None:
             """Populate UI from the current `__default__.screens` options."""
-            options = gsv_utils.get_list_options("__default__.screens")
+            self._populate_from(
+                gsv_utils.get_screen_options(),
+                gsv_utils.get_value("__default__.screens"),
+            )
+
+        def _populate_from(self, options: Sequence[str], current: Optional[str]) -> None:
+            """Show `options` in the UI with `current` selected.
+
+            Any reload queued by GSV callbacks is dropped, since the UI now
+            reflects the given state.
+            """
+            self._reload_pending = False
             self._set_combo_items(self.default_combo, options)
-            # Set combo to current selection without emitting change
-            current = gsv_utils.get_value("__default__.screens")
+            # Set combo to current selection without emitting change. The guard
+            # only trusts `current` when the combo can actually show it.
+            self._last_applied_screen = None
             if current:
                 try:
                     self.default_combo.blockSignals(True)
                     idx = self.default_combo.findText(current)
                     if idx >= 0:
                         self.default_combo.setCurrentIndex(idx)
+                        self._last_applied_screen = current
                 finally:
                     self.default_combo.blockSignals(False)
             if options:
@@ -221,26 +266,39 @@ else:
         def _install_gsv_callback(self) -> None:
             """Install a GSV change callback to keep UI synced with globals.
 
-            Uses `nuke.callbacks.onGsvSetChanged` when available. The handler is
-            resilient to signature differences across Nuke versions and simply
-            reloads the combobox/text from the root GSV when any change occurs.
+            Registers through `gsv_utils.add_gsv_change_callback`. A single
+            module-level handler is registered per process and forwards to
+            `ScreensManagerPanel.instance`, so reopening the panel or reloading
+            the plugin never stacks duplicate handlers. When no registration
+            API exists the flag stays unset; the UI still works via direct
+            combobox edits and refreshes itself after Apply.
             """
 
-            if nuke is None:
+            global _GSV_CALLBACK_INSTALLED
+            if nuke is None or _GSV_CALLBACK_INSTALLED:
+                return
+            if gsv_utils.add_gsv_change_callback(_on_gsv_changed):
+                _GSV_CALLBACK_INSTALLED = True
+
+        def _schedule_reload(self) -> None:
+            """Coalesce bursts of GSV changes into one `_load_from_gsv` call.
+
+            Applying screens fires one GSV callback per option, set and
+            default written; the reload runs once when control returns to the
+            Qt event loop.
+            """
+            if self._reload_pending:
+                return
+            self._reload_pending = True
+            QtCore.QTimer.singleShot(0, self._flush_reload)
+
+        def _flush_reload(self) -> None:
+            """Run the queued reload, unless the UI was repopulated meanwhile."""
+            if not self._reload_pending:
                 return
             try:
-                cb_mod = getattr(nuke, "callbacks", None)
-                if cb_mod and hasattr(cb_mod, "onGsvSetChanged"):
-                    # Register once per widget instance
-                    def _handler(*_args, **_kwargs):  # noqa: D401
-                        try:
-                            self._load_from_gsv()
-                        except Exception:
-                            pass
-
-                    cb_mod.onGsvSetChanged(_handler)
+                self._load_from_gsv()
             except Exception:
-                # Best-effort; UI will still work via direct combobox edits
                 pass
 
         def _set_combo_items(self, combo: QtWidgets.QComboBox, items: Sequence[str]) -> None:
@@ -248,8 +306,7 @@ else:
             try:
                 combo.blockSignals(True)
                 combo.clear()
-                for item in items:
-                    combo.addItem(item)
+                combo.addItems(list(items))
             finally:
                 combo.blockSignals(False)
 
@@ -258,15 +315,8 @@ else:
             text = self.screens_edit.text().strip()
             if not text:
                 return []
-            names = [n.strip() for n in text.split(",")]
-            # de-duplicate while preserving order
-            seen = set()
-            unique: List[str] = []
-            for n in names:
-                if n and n not in seen:
-                    unique.append(n)
-                    seen.add(n)
-            return unique
+            # de-duplicate while preserving order (dicts keep insertion order)
+            return [n for n in dict.fromkeys(n.strip() for n in text.split(",")) if n]
 
         # Actions
         def _on_apply(self) -> None:
@@ -274,23 +324,24 @@ else:
             screens = self._parse_screens()
             if not screens:
                 return
-            default = self.default_combo.currentText() or screens[0]
+            default = self.default_combo.currentText()
+            if default not in screens:
+                default = screens[0]
             gsv_utils.ensure_screen_list(screens, default)
             # Also ensure each screen has a Set at the root for %Set.Var usage
             gsv_utils.ensure_screen_sets(screens)
             # Proactively ensure a VariableGroup per screen so artists see a
             # dedicated scope folder after adding new screens.
             try:
-                for name in screens:
-                    gsv_utils.create_variable_group(f"screen_{name}")
+                gsv_utils.ensure_variable_groups(f"screen_{name}" for name in screens)
             except Exception:
                 pass
-            self._load_from_gsv()
+            # The GSV now holds exactly what was applied; show it without re-reading.
+            self._populate_from(screens, default)
 
         def _on_groups(self) -> None:
             """Ensure VariableGroup nodes exist for each screen name."""
-            for name in self._parse_screens():
-                gsv_utils.create_variable_group(f"screen_{name}")
+            gsv_utils.ensure_variable_groups(f"screen_{name}" for name in self._parse_screens())
 
         def _on_switch(self) -> None:
             """Create a `VariableSwitch` named `ScreenSwitch` and auto-wire Dots.
@@ -305,7 +356,7 @@ else:
             if nuke is None:
                 return
 
-            screens: List[str] = gsv_utils.get_list_options("__default__.screens")
+            screens: List[str] = gsv_utils.get_screen_options()
             if not screens:
                 screens = self._parse_screens()
             if not screens:
@@ -315,10 +366,13 @@ else:
                 switch = nuke.nodes.VariableSwitch()
                 switch_name = nuke.uniqueName("ScreenSwitch")
                 switch.setName(switch_name)
+                # One knobs() snapshot serves every lookup on the switch below.
+                switch_knobs = switch.knobs()
 
                 try:
-                    if "variable" in switch.knobs():
-                        switch["variable"].setValue("__default__.screens")
+                    variable = switch_knobs.get("variable")
+                    if variable is not None:
+                        variable.setValue("__default__.screens")
                 except Exception:
                     pass
 
@@ -344,8 +398,9 @@ else:
                     try:
                         dot["xpos"].setValue(sx - 150)
                         dot["ypos"].setValue(sy + idx * spacing_y)
-                        if "label" in dot.knobs():
-                            dot["label"].setValue(name)
+                        label_knob = dot.knob("label")
+                        if label_knob is not None:
+                            label_knob.setValue(name)
                     except Exception:
                         pass
                     try:
@@ -353,16 +408,17 @@ else:
                     except Exception:
                         pass
 
+                patterns = switch_knobs.get("patterns")
                 for idx, name in enumerate(screens):
                     try:
-                        switch["patterns"].setValueAt(name, idx)
+                        patterns.setValueAt(name, idx)
                         continue
                     except Exception:
                         pass
                     try:
-                        key = f"i{idx}"
-                        if key in switch.knobs():
-                            switch[key].setValue(name)
+                        knob = switch_knobs.get(f"i{idx}")
+                        if knob is not None:
+                            knob.setValue(name)
                     except Exception:
                         pass
             except Exception:
@@ -370,12 +426,14 @@ else:
 
         def _on_default_changed(self, text: str) -> None:
             """Update the global selector `__default__.screens` to match combobox."""
-            if not text:
+            if not text or text == self._last_applied_screen:
                 return
+            # Only a confirmed write may skip the next identical selection.
             try:
-                gsv_utils.set_value("__default__.screens", text)
+                written = gsv_utils.set_value("__default__.screens", text)
             except Exception:
-                pass
+                written = False
+            self._last_applied_screen = text if written else None
 
 
 def set_default_screen_via_ui(name: str) -> bool:
@@ -383,7 +441,7 @@ def set_default_screen_via_ui(name: str) -> bool:
 
     Returns True when the UI was updated, False if the UI wasn't found.
     """
-    if QtWidgets is None:
+    if QtWidgets is None or not _IS_GUI:
         return False
     try:
         # If we have a live instance, use its API
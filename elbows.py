@@ -14,37 +14,34 @@ def organize_node_streams():
     """
     import nuke
 
-    def already_has_dot_at_position(connection_node, x, y):
+    def dot_positions(inputs):
         """
-        Checks whether 'connection_node' has a Dot at the (x, y) position
-        that is already wired up to it. Prevents creating duplicate dots.
+        Return the set of (x, y) positions of the Dots among 'inputs', the nodes
+        already wired into a connection node. Built at most once per node, when
+        its first elbow is needed, so later duplicate checks are set lookups.
         """
-        if not connection_node:
-            return False
+        return {(inp.xpos(), inp.ypos()) for inp in inputs if inp and inp.Class() == "Dot"}
 
-        for idx in range(connection_node.inputs()):
-            inp = connection_node.input(idx)
-            if inp and inp.Class() == "Dot":
-                if inp.xpos() == x and inp.ypos() == y:
-                    return True
-        return False
-
-    def create_dot_between_nodes(input_node, current_node, input_index):
+    def create_dot_between_nodes(input_node, current_node, input_index, occupied):
         """
         Create a Dot between 'input_node' and 'current_node' for the given input_index.
         The Dot is placed horizontally at input_node.xpos() and vertically at current_node.ypos().
+        'occupied' holds the Dot positions already wired into 'current_node' and is
+        updated with the new Dot.
         """
-        # Get half the node's height to set the dot's font size
-        node_half_height = current_node.screenHeight() * 0.5
-
         dot_x = input_node.xpos()
         dot_y = current_node.ypos()
 
         # Avoid duplicate Dots at the same position
-        if already_has_dot_at_position(current_node, dot_x, dot_y):
+        if (dot_x, dot_y) in occupied:
             return  # Don't create another Dot
 
-        dot = nuke.createNode("Dot", inpanel=False)
+        # Get half the node's height to set the dot's font size
+        node_half_height = current_node.screenHeight() * 0.5
+
+        # nuke.nodes skips createNode's cursor placement, auto-connect to the
+        # selection and panel handling; the Dot is placed and wired explicitly.
+        dot = nuke.nodes.Dot()
         dot.setXpos(dot_x)
         dot.setYpos(dot_y)
         dot["note_font_size"].setValue(node_half_height)
@@ -52,34 +49,49 @@ def organize_node_streams():
         # Rewire: input_node -> dot -> current_node
         dot.setInput(0, input_node)
         current_node.setInput(input_index, dot)
+        occupied.add((dot_x, dot_y))
 
-    def process_node(node, visited):
+    def process_nodes(start_nodes):
         """
-        Recursively process each node's inputs. If an input is higher on the node graph 
-        (input_node.yPos() < node.yPos()) and misaligned (input_node.xPos() != node.xPos()), 
-        create a Dot node so the connection becomes a right angle.
+        Walk upstream from 'start_nodes' with an explicit stack. If an input is higher
+        on the node graph (input_node.ypos() < node.ypos()) and misaligned
+        (input_node.xpos() != node.xpos()), create a Dot node so the connection becomes
+        a right angle. Iterative so deep trees cannot hit the recursion limit.
         """
-        if node in visited:
-            return
-        visited.add(node)
-
-        # Check up to 3 inputs (Nuke generally allows up to 3 for merges, though some nodes have more)
-        for i in range(node.inputs()):
-            input_node = node.input(i)
-            if not input_node:
+        visited = set()
+        stack = list(reversed(start_nodes))
+        while stack:
+            node = stack.pop()
+            if node in visited:
                 continue
+            visited.add(node)
+
+            node_x = node.xpos()
+            node_y = node.ypos()
+            inputs = [node.input(i) for i in range(node.inputs())]
+            occupied = None  # Dot positions, built when the first elbow is needed
+            upstream = []
+            for i, input_node in enumerate(inputs):
+                if not input_node:
+                    continue
+
+                higher_input = (input_node.ypos() < node_y)
+                x_misaligned = (input_node.xpos() != node_x)
 
-            higher_input = (input_node.yPos() < node.yPos())
-            x_misaligned = (input_node.xPos() != node.xPos())
+                # If this input is above the current node and has a different X, insert a dot
+                if higher_input and x_misaligned:
+                    if occupied is None:
+                        occupied = dot_positions(inputs)
+                    create_dot_between_nodes(input_node, node, i, occupied)
 
-            # If this input is above the current node and has a different X, insert a dot
-            if higher_input and x_misaligned:
-                create_dot_between_nodes(input_node, node, i)
+                upstream.append(input_node)
 
-            # Recurse upstream
-            process_node(input_node, visited)
+            # Continue upstream, visiting inputs in order as the recursive walk did
+            stack.extend(reversed(upstream))
 
-    selected_nodes = nuke.selectedNodes()
-    visited_nodes = set()
-    for sel_node in selected_nodes:
-        process_node(sel_node, visited_nodes)
+    # One undo step for the whole pass instead of one per inserted Dot
+    nuke.Undo.begin("Organize Node Streams")
+    try:
+        process_nodes(nuke.selectedNodes())
+    finally:
+        nuke.Undo.end()
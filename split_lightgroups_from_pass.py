@@ -4,13 +4,37 @@ Nuke Python Script: Split Lightgroup Passes
 
 This script takes a selected Shuffle node and automatically creates separate
 shuffle nodes for all lightgroup variants of the pass, then combines them
-using Merge (plus) nodes.
+using a balanced tree of Merge (plus) nodes.
 
 Author: Nuke Python Script
 """
 
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
 import nuke
 
+
+@dataclass
+class SplitPlan:
+    """
+    Everything a split will change, gathered with read-only DAG queries.
+
+    Shuffles take the first len(layers) slots of the node list built while
+    applying; each merge appends one more, reading two earlier slots, so the
+    last slot is the combined output.
+    """
+
+    selected_node: object
+    input_node: object
+    layers: List[str]
+    shuffle_positions: List[Tuple[int, int]]  # (xpos, ypos) per layer
+    existing_shuffles: Dict[str, object]  # layer -> Shuffle2 left by an earlier run
+    merges: List[Tuple[int, int, int, int]]  # (B slot, A slot, xpos, ypos)
+    rewires: List[Tuple[object, int]]  # (dependent, input slot) fed by the original
+    parked_x: int  # where the original shuffle is moved to
+
+
 def split_lightgroups_from_pass():
     """
     Main function to split lightgroup passes from a selected Shuffle node.
@@ -19,7 +43,7 @@ def split_lightgroups_from_pass():
     1. Gets the selected Shuffle node and its 'in' knob value (e.g., 'specular')
     2. Searches for all related lightgroup layers (e.g., 'specular_Dome', 'specular_Lab_btm')
     3. Creates new Shuffle nodes for each lightgroup variant
-    4. Creates Merge (plus) nodes to combine all variants
+    4. Creates a balanced tree of Merge (plus) nodes to combine all variants
     5. Disconnects the original Shuffle node
     """
     
@@ -47,17 +71,15 @@ def split_lightgroups_from_pass():
         nuke.message("The selected Shuffle node has no input.")
         return
     
-    # Get all available layers from the input node
-    all_layers = input_node.channels()
-    
-    # Extract layer names (everything before the dot)
-    layer_names = list(set([channel.split('.')[0] for channel in all_layers]))
-    
-    # Find all lightgroup variants for the selected pass
-    lightgroup_layers = []
-    for layer in layer_names:
-        if layer.startswith(pass_name + "_"):
-            lightgroup_layers.append(layer)
+    # Find all lightgroup variants for the selected pass. Length and first
+    # character reject most unrelated layers before startswith is called
+    prefix_match = pass_name + "_"
+    prefix_len = len(prefix_match)
+    prefix_first = prefix_match[0]
+    lightgroup_layers = [
+        layer for layer in _layer_names(input_node)
+        if len(layer) > prefix_len and layer[0] == prefix_first and layer.startswith(prefix_match)
+    ]
     
     if not lightgroup_layers:
         nuke.message(f"No lightgroup variants found for pass '{pass_name}'.")
@@ -66,80 +88,175 @@ def split_lightgroups_from_pass():
     # Sort the layers for consistent ordering
     lightgroup_layers.sort()
     
-    # Get the position of the original shuffle node for layout
-    original_x = selected_node['xpos'].value()
-    original_y = selected_node['ypos'].value()
+    # Plan with read-only queries, then make every change in one undo step
+    plan = compute_plan(selected_node, input_node, lightgroup_layers)
+    nuke.Undo.begin("Split Lightgroups")
+    try:
+        apply_plan(plan)
+    finally:
+        nuke.Undo.end()
+
+    print(f"Successfully split '{pass_name}' into {len(lightgroup_layers)} lightgroup variants:")
+    for layer in lightgroup_layers:
+        print(f"  - {layer}")
+
+
+def _layer_names(node):
+    """
+    Return the unique layer names available on a node.
+
+    nuke.layers() reports them directly; should it fail, fall back to a single
+    pass over the node's channels, taking everything before each dot.
+    """
+
+    try:
+        return nuke.layers(node)
+    except Exception:
+        pass
+    seen = {}
+    for channel in node.channels():
+        dot = channel.find('.')
+        seen[channel[:dot] if dot >= 0 else channel] = None
+    return seen
+
+
+def _existing_lightgroup_shuffles(input_node, lightgroup_layers):
+    """
+    Return {layer: node} for Shuffle2 nodes an earlier run left on the input.
+
+    A node counts when it reads the input directly and its label and 'in1'
+    both name one of the wanted layers, which is how this script builds them.
+    """
+
+    wanted = set(lightgroup_layers)
+    existing = {}
+    for node in input_node.dependent(nuke.INPUTS, forceEvaluate=False):
+        if node.Class() != "Shuffle2" or node.input(0) != input_node:
+            continue
+        layer = node['in1'].value()
+        if layer in wanted and layer not in existing and node['label'].value() == layer:
+            existing[layer] = node
+    return existing
+
+
+def compute_plan(selected_node, input_node, lightgroup_layers):
+    """
+    Work out the lightgroup network for a split without changing the DAG.
+
+    Returns a SplitPlan holding the shuffle layout, the balanced merge tree,
+    any shuffles to reuse and the input slots to rewire.
+    """
+
+    # Get the position of the original shuffle node for layout. xpos()/ypos()
+    # return ints, so all layout arithmetic below stays in ints
+    original_x = selected_node.xpos()
+    original_y = selected_node.ypos()
     
-    # Store the output connection of the original shuffle (if any)
-    original_dependents = selected_node.dependent()
+    # Record every (dependent, input slot) fed by the original shuffle, so the
+    # rewiring is only setInput calls. Only input connections are rewired, so
+    # expression links are not followed and knobs are not force-evaluated while
+    # collecting them. Nuke returns a fresh wrapper from every input() call, so
+    # slots are matched with == rather than identity, and every slot is checked
+    # because a node may take the shuffle on more than one input (e.g. a
+    # Merge's A and B)
+    rewires = []
+    for dependent in selected_node.dependent(nuke.INPUTS | nuke.HIDDEN_INPUTS, forceEvaluate=False):
+        input_at = dependent.input
+        for i in range(dependent.inputs()):
+            if input_at(i) == selected_node:
+                rewires.append((dependent, i))
     
-    # Create shuffle nodes for each lightgroup variant
-    shuffle_nodes = []
-    x_offset = 0
+    # Lay out every shuffle: one row below the original, spaced horizontally.
+    # Shuffles left by an earlier run on the same input are reused where they
+    # stand instead of being created again
     y_offset = 150  # Vertical offset for new nodes
-    
+    x_spacing = 120  # Horizontal spacing between nodes
+    shuffle_y = original_y + y_offset
+    existing_shuffles = _existing_lightgroup_shuffles(input_node, lightgroup_layers)
+    shuffle_positions = []
     for i, layer in enumerate(lightgroup_layers):
-        # Create new shuffle2 node
-        new_shuffle = nuke.nodes.Shuffle2(
-            inputs=[input_node],
-            label=layer
-        )
-        
-        # Set the layer for this shuffle2
-        new_shuffle['in1'].setValue(layer)
-        
-        # Position the node
-        new_shuffle['xpos'].setValue(original_x + x_offset)
-        new_shuffle['ypos'].setValue(original_y + y_offset)
-        
-        # Store the shuffle node
-        shuffle_nodes.append(new_shuffle)
-        
-        # Update position for next node
-        x_offset += 120  # Horizontal spacing between nodes
-    
-    # Create merge chain: first shuffle goes directly to parent, subsequent shuffles get merged
-    if len(shuffle_nodes) > 0:
-        # First shuffle connects directly to the parent source node
-        current_output = shuffle_nodes[0]
-        
-        # Create merge nodes for remaining shuffles (starting from second shuffle)
-        merge_y_offset = y_offset + 120  # Position merges below shuffles
-        
-        for i in range(1, len(shuffle_nodes)):
-            # Create merge node: B=previous result (input 0), A=current shuffle (input 1)
-            merge_node = nuke.nodes.Merge2(operation='plus')
-            merge_node.setInput(0, current_output)        # B input (input 0): previous result
-            merge_node.setInput(1, shuffle_nodes[i])      # A input (input 1): current lightgroup shuffle
-            
-            # Position merge below current shuffle
-            merge_node['xpos'].setValue(shuffle_nodes[i]['xpos'].value())
-            merge_node['ypos'].setValue(original_y + merge_y_offset)
-            
-            # This merge becomes the input for the next iteration
-            current_output = merge_node
-        
-        final_output = current_output
-    else:
-        # Fallback if no lightgroups found
-        final_output = selected_node
+        shuffle = existing_shuffles.get(layer)
+        if shuffle is None:
+            shuffle_positions.append((original_x + i * x_spacing, shuffle_y))
+        else:
+            shuffle_positions.append((shuffle.xpos(), shuffle.ypos()))
+    
+    # Combine the shuffles with a balanced tree of plus merges rather than a
+    # chain: plus is associative, so the result is identical, but the longest
+    # path through the merges grows with log2 of the lightgroup count
+    merges = []
+    # Each entry is the slot of a node still to be merged and its x position
+    level = [(slot, position[0]) for slot, position in enumerate(shuffle_positions)]
+    next_slot = len(level)
+    merge_y = shuffle_y + 120  # Position merges below shuffles
+    while len(level) > 1:
+        next_level = []
+        for j in range(0, len(level) - 1, 2):
+            (b_slot, b_x), (a_slot, a_x) = level[j], level[j + 1]
+            # Merge node: B=left node (input 0), A=right node (input 1),
+            # centred between them
+            merge_x = (b_x + a_x) // 2
+            merges.append((b_slot, a_slot, merge_x, merge_y))
+            next_level.append((next_slot, merge_x))
+            next_slot += 1
+        # An odd node out is carried up to be merged on the next level
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+        merge_y += 80
+    
+    return SplitPlan(
+        selected_node=selected_node,
+        input_node=input_node,
+        layers=list(lightgroup_layers),
+        shuffle_positions=shuffle_positions,
+        existing_shuffles=existing_shuffles,
+        merges=merges,
+        rewires=rewires,
+        parked_x=original_x - 200,
+    )
+
+
+def apply_plan(plan):
+    """
+    Build the planned Shuffle2/Merge2 network and rewire the original's outputs.
+
+    Only creates nodes and sets inputs and positions; callers wrap it in an
+    undo group. Nodes are created with their final knob values passed to the
+    constructor, so each one is set up in a single call instead of a call per
+    knob.
+    """
+
+    # Node constructors, looked up once rather than per node created
+    make_shuffle = nuke.nodes.Shuffle2
+    make_merge = nuke.nodes.Merge2
+    input_node = plan.input_node
+    
+    # Create shuffle nodes for each lightgroup variant, already set to their
+    # layer and position, unless an earlier one is being reused
+    nodes = []
+    for layer, (x, y) in zip(plan.layers, plan.shuffle_positions):
+        shuffle = plan.existing_shuffles.get(layer)
+        if shuffle is None:
+            shuffle = make_shuffle(inputs=[input_node], label=layer, in1=layer, xpos=x, ypos=y)
+        nodes.append(shuffle)
+    
+    # Create the merge tree; each merge takes the next slot
+    for b_slot, a_slot, x, y in plan.merges:
+        nodes.append(make_merge(inputs=[nodes[b_slot], nodes[a_slot]], operation='plus', xpos=x, ypos=y))
+    final_output = nodes[-1]
     
     # Reconnect any nodes that were connected to the original shuffle
-    for dependent in original_dependents:
-        for i in range(dependent.inputs()):
-            if dependent.input(i) == selected_node:
-                dependent.setInput(i, final_output)
+    for dependent, i in plan.rewires:
+        dependent.setInput(i, final_output)
     
     # Disconnect the original shuffle node from its input
+    selected_node = plan.selected_node
     selected_node.setInput(0, None)
     
-    # Position the original shuffle node to the side
-    selected_node['xpos'].setValue(original_x - 200)
-    selected_node['ypos'].setValue(original_y)
-    
-    print(f"Successfully split '{pass_name}' into {len(lightgroup_layers)} lightgroup variants:")
-    for layer in lightgroup_layers:
-        print(f"  - {layer}")
+    # Move the original shuffle node to the side; its y position is unchanged,
+    # so only x is written
+    selected_node.setXpos(plan.parked_x)
 
 # Run the function when script is executed
 if __name__ == "__main__":